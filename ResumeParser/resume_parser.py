@@ -1,23 +1,328 @@
 import os
+import io
 import json
 import csv
+import argparse
+import asyncio
+import hashlib
+import queue
+import random
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
 from typing import Dict, Optional, List, Any, Tuple
 from docx import Document
 import PyPDF2
 from dotenv import load_dotenv
+from pydantic import BaseModel, ConfigDict, ValidationError
+import httpx
 import openai
 
+# pypdfium2 wraps the PDFium C++ library and is much faster than PyPDF2;
+# fall back to PyPDF2 when it is not installed
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+# ijson streams large batch responses record by record; fall back to
+# json.loads when it is not installed
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# ijson's JSONError does not subclass ValueError like json.JSONDecodeError
+BATCH_PARSE_ERRORS = (ValueError,) if ijson is None else (ValueError, ijson.common.JSONError)
+
+# tiktoken gives exact token counts for truncation; fall back to a
+# character-based estimate when it is not installed
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# pyarrow enables columnar Parquet output; fall back to plain CSV rows
+# when it is not installed
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
 # Load environment variables
 load_dotenv()
 
 # Initialize OpenAI client
 openai.api_key = os.getenv('OPENAI_API_KEY')
 
+# Shared AsyncOpenAI client; one HTTP connection pool for the process so
+# repeated ResumeParser construction never pays a new TCP+TLS handshake
+_async_client: Optional[openai.AsyncOpenAI] = None
+
+def get_async_client() -> openai.AsyncOpenAI:
+    global _async_client
+    if _async_client is None:
+        # Explicit pool limits so dozens of concurrent requests reuse
+        # kept-alive HTTP/2 connections instead of re-handshaking
+        _async_client = openai.AsyncOpenAI(
+            http_client=httpx.AsyncClient(
+                http2=True,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+                timeout=httpx.Timeout(60.0, connect=5.0)
+            )
+        )
+    return _async_client
+
+# Maximum number of resumes combined into one API call
+MAX_BATCH_SIZE = 5
+
+# Context window of gpt-3.5-turbo, used to auto-tune batch sizes
+MODEL_CONTEXT_TOKENS = 16385
+
+# gpt-3.5-turbo rejects max_tokens above 4096, so a batch shares this
+# completion budget; each resume's share is what batch sizing charges
+MODEL_COMPLETION_TOKENS = 4096
+BATCH_COMPLETION_SHARE = MODEL_COMPLETION_TOKENS // MAX_BATCH_SIZE
+
+# Model used for all extractions; part of the cache key
+MODEL_NAME = "gpt-3.5-turbo"
+
+# Longest resume text sent to the model; anything past this is boilerplate
+MAX_RESUME_TOKENS = 8000
+
+# Cheap pre-checks that let obviously bad or trivial extractions skip the LLM
+MIN_RESUME_CHARS = 200
+LONG_WORD_RE = re.compile(r"[A-Za-z]{10,}")
+SECTION_RE = re.compile(r"\b(experience|education|employment|work history)\b", re.IGNORECASE)
+EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+\.\w[\w.-]*")
+PHONE_RE = re.compile(r"\+?\d[\d\s().-]{7,}\d")
+
+# Text extraction lives at module level so worker processes can pickle
+# and run it without constructing a ResumeParser
+
+def extract_text_from_pdf(pdf_path: str) -> Optional[str]:
+    if pdfium is not None:
+        try:
+            return _extract_text_pdfium(pdf_path)
+        except Exception as e:
+            print(f"pypdfium2 failed on {pdf_path}, falling back to PyPDF2: {str(e)}")
+    try:
+        with open(pdf_path, 'rb') as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            # Collect page texts and join once; += on a str is O(N^2)
+            # over the document and PyPDF2 pages are parsed lazily
+            parts = []
+            for page in pdf_reader.pages:
+                parts.append(page.extract_text() or "")
+            return ''.join(parts)
+    except Exception as e:
+        print(f"Error extracting text from PDF {pdf_path}: {str(e)}")
+        return None
+
+def _extract_text_pdfium(pdf_path: str) -> str:
+    """Extract PDF text with pypdfium2 (PDFium)."""
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        parts = []
+        for page in pdf:
+            textpage = page.get_textpage()
+            parts.append(textpage.get_text_range())
+            # Release native page resources promptly so memory stays
+            # constant even for very large PDFs
+            textpage.close()
+            page.close()
+        return '\n'.join(parts)
+    finally:
+        pdf.close()
+
+def extract_text_from_docx(docx_path: str) -> Optional[str]:
+    try:
+        doc = Document(docx_path)
+        text = '\n'.join([paragraph.text for paragraph in doc.paragraphs])
+        return text
+    except Exception as e:
+        print(f"Error extracting text from DOCX {docx_path}: {str(e)}")
+        return None
+
+def extract_text_from_txt(txt_path: str) -> Optional[str]:
+    try:
+        with open(txt_path, 'r', encoding='utf-8') as file:
+            return file.read()
+    except Exception as e:
+        print(f"Error reading text file {txt_path}: {str(e)}")
+        return None
+
+def extract_text(file_path: str) -> Optional[str]:
+    """Extract raw text from a resume file based on its extension."""
+    _, ext = os.path.splitext(file_path)
+    ext = ext.lower()
+
+    if ext == '.pdf':
+        return extract_text_from_pdf(file_path)
+    elif ext == '.docx':
+        return extract_text_from_docx(file_path)
+    elif ext == '.txt':
+        return extract_text_from_txt(file_path)
+
+    print(f"Unsupported file format: {ext}")
+    return None
+
+class Contact(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+    email: str = ""
+    phone: str = ""
+
+class Experience(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+    job_title: str = ""
+    company_name: str = ""
+    duration_dates: str = ""
+    key_responsibilities: List[str] = []
+
+class Resume(BaseModel):
+    """Schema the model output is validated against."""
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+    name: str = ""
+    contact: Contact = Contact()
+    skills: List[str] = []
+    experience: List[Experience] = []
+
+class ExtractionCache:
+    """Content-addressable cache of validated extractions.
+
+    Entries are keyed by a SHA-256 over model, system prompt and resume
+    text, so a resume is only re-sent to OpenAI when its content or the
+    prompt actually changes. Each entry records the model, prompt hash and
+    a UTC timestamp alongside the payload for auditing.
+    """
+    def __init__(self, cache_dir: str = 'cache'):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, model: str, prompt: str, text: str) -> str:
+        digest = hashlib.sha256()
+        digest.update(model.encode('utf-8') + b'\x00')
+        digest.update(prompt.encode('utf-8') + b'\x00')
+        digest.update(text.encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = os.path.join(self.cache_dir, f"{key}.json")
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f).get('payload')
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Error reading cache entry {key}: {str(e)}")
+            return None
+
+    def put(self, key: str, model: str, prompt_sha: str, payload: Dict[str, Any]):
+        entry = {
+            'model': model,
+            'prompt_sha': prompt_sha,
+            'cached_at': datetime.now(timezone.utc).isoformat(),
+            'payload': payload
+        }
+        try:
+            with open(os.path.join(self.cache_dir, f"{key}.json"), 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+        except OSError as e:
+            print(f"Error writing cache entry {key}: {str(e)}")
+
+class AdaptiveConcurrency:
+    """AIMD concurrency controller, in the spirit of TCP congestion control.
+
+    Starts at a small capacity, adds one slot after a streak of successful
+    calls, and halves capacity whenever OpenAI returns a rate-limit or
+    server error, so the pipeline finds the account's real throughput
+    without a hand-tuned constant.
+    """
+    def __init__(self, start: int = 4, maximum: int = 32, increase_after: int = 60):
+        self.capacity = max(1, start)
+        self.maximum = maximum
+        self.increase_after = increase_after
+        self._successes = 0
+        self._in_flight = 0
+        self._condition = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._condition:
+            while self._in_flight >= self.capacity:
+                await self._condition.wait()
+            self._in_flight += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        async with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    async def record_success(self):
+        async with self._condition:
+            self._successes += 1
+            if self._successes >= self.increase_after and self.capacity < self.maximum:
+                self._successes = 0
+                self.capacity += 1
+                print(f"Concurrency increased to {self.capacity}")
+                self._condition.notify_all()
+
+    async def record_failure(self):
+        async with self._condition:
+            self._successes = 0
+            if self.capacity > 1:
+                self.capacity = max(1, self.capacity // 2)
+                print(f"Concurrency halved to {self.capacity}")
+
+class RateLimiter:
+    """Token-bucket throttler tracking per-minute request and token budgets."""
+    def __init__(self, max_requests_per_minute: int = 500, max_tokens_per_minute: int = 90000):
+        self.max_requests_per_minute = max_requests_per_minute
+        self.max_tokens_per_minute = max_tokens_per_minute
+        self.request_capacity = float(max_requests_per_minute)
+        self.token_capacity = float(max_tokens_per_minute)
+        self.last_refill = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: int):
+        """Wait until there is budget for one request consuming `tokens` tokens."""
+        while True:
+            async with self._lock:
+                now = time.monotonic()
+                elapsed = now - self.last_refill
+                self.request_capacity = min(self.max_requests_per_minute,
+                                            self.request_capacity + self.max_requests_per_minute * elapsed / 60.0)
+                self.token_capacity = min(self.max_tokens_per_minute,
+                                          self.token_capacity + self.max_tokens_per_minute * elapsed / 60.0)
+                self.last_refill = now
+                if self.request_capacity >= 1 and self.token_capacity >= tokens:
+                    self.request_capacity -= 1
+                    self.token_capacity -= tokens
+                    return
+            await asyncio.sleep(1)
+
 class ResumeParser:
-    def __init__(self):
+    def __init__(self, rate_limiter: Optional[RateLimiter] = None,
+                 concurrency: Optional[AdaptiveConcurrency] = None):
         if not os.getenv('OPENAI_API_KEY'):
             raise ValueError("OpenAI API key not found. Please set it in the .env file.")
-        
+
+        self.client = get_async_client()
+        self.rate_limiter = rate_limiter
+        self.concurrency = concurrency
+        self.cache = ExtractionCache()
+        # Pre-warm the encoder once; encoding_for_model is slow on first use
+        self._encoder = tiktoken.encoding_for_model(MODEL_NAME) if tiktoken else None
+        # Diagnostic counters for the run
+        self.validation_retries = 0
+        self.validation_failures = 0
+
         self.system_prompt = """
         You are a resume parser. Extract ONLY the following information from the resume and return it in this exact JSON format:
         {
@@ -44,106 +349,100 @@ class ResumeParser:
         4. Keep descriptions brief and concise
         5. Do not categorize or classify the skills
         """
+        self.prompt_sha = hashlib.sha256(self.system_prompt.encode('utf-8')).hexdigest()
+        # Built once and reused for every call; rule #1 of the prompt
+        # already requires JSON-only output
+        self._system_msg = {"role": "system", "content": self.system_prompt}
+        # gpt-3.5-turbo only supports JSON mode, not strict schemas; the
+        # Resume shape is enforced by Pydantic validation of the response
+        self._response_format = {"type": "json_object"}
 
-    def extract_text_from_pdf(self, pdf_path: str) -> Optional[str]:
-        try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in pdf_reader.pages:
-                    text += page.extract_text()
-                return text
-        except Exception as e:
-            print(f"Error extracting text from PDF {pdf_path}: {str(e)}")
-            return None
-
-    def extract_text_from_docx(self, docx_path: str) -> Optional[str]:
-        try:
-            doc = Document(docx_path)
-            text = '\n'.join([paragraph.text for paragraph in doc.paragraphs])
-            return text
-        except Exception as e:
-            print(f"Error extracting text from DOCX {docx_path}: {str(e)}")
-            return None
+    async def _create_completion(self, messages: List[Dict[str, str]], max_tokens: int = 2000,
+                                 response_format: Optional[Dict[str, Any]] = None):
+        """Call the chat completions API, throttling and retrying on rate limits."""
+        # Rough token estimate: prompt contents at ~4 chars per token, plus completion budget
+        estimated_tokens = sum(len(m['content']) for m in messages) // 4 + max_tokens
+        request: Dict[str, Any] = {
+            "model": MODEL_NAME,  # Using GPT-3.5 for faster response
+            "messages": messages,
+            "temperature": 0.1,
+            "max_tokens": max_tokens
+        }
+        if response_format is not None:
+            request["response_format"] = response_format
+        max_retries = 5
+        for attempt in range(max_retries):
+            if self.rate_limiter:
+                await self.rate_limiter.acquire(estimated_tokens)
+            try:
+                response = await self.client.chat.completions.create(**request)
+            except (openai.RateLimitError, openai.InternalServerError) as e:
+                if self.concurrency:
+                    await self.concurrency.record_failure()
+                # Exponential backoff with jitter
+                delay = min(60, 2 ** attempt + random.uniform(0, 1))
+                print(f"{type(e).__name__} from OpenAI, retrying in {delay:.1f}s "
+                      f"(attempt {attempt + 1}/{max_retries})")
+                await asyncio.sleep(delay)
+                continue
+            if self.concurrency:
+                await self.concurrency.record_success()
+            return response
+        print("Giving up after repeated rate limit errors.")
+        return None
 
-    def extract_text_from_txt(self, txt_path: str) -> Optional[str]:
-        try:
-            with open(txt_path, 'r', encoding='utf-8') as file:
-                return file.read()
-        except Exception as e:
-            print(f"Error reading text file {txt_path}: {str(e)}")
-            return None
-            
-    def extract_information(self, text: str) -> Dict[str, Any]:
-        """Extract information from resume text using OpenAI's GPT model."""
-        messages = [
-            {"role": "system", "content": f"{self.system_prompt}\nRespond ONLY with a valid JSON object."}, 
+    def _build_messages(self, text: str) -> List[Dict[str, str]]:
+        """Build the chat messages for extracting a single resume."""
+        return [
+            self._system_msg,
             {"role": "user", "content": f"Please extract information from this resume:\n\n{text}"}
         ]
 
+    def _cache_key(self, text: str) -> str:
+        return self.cache.key(MODEL_NAME, self.system_prompt, text)
+
+    def _cache_put(self, text: str, payload: Dict[str, Any]):
+        self.cache.put(self._cache_key(text), MODEL_NAME, self.prompt_sha, payload)
+
+    async def extract_information(self, text: str) -> Dict[str, Any]:
+        """Extract information from resume text using OpenAI's GPT model."""
+        cached = self.cache.get(self._cache_key(text))
+        if cached is not None:
+            print("Cache hit - skipping OpenAI call")
+            return cached
+
+        messages = self._build_messages(text)
+
         try:
-            # Set a timeout for the API call
-            response = openai.chat.completions.create(
-                model="gpt-3.5-turbo",  # Using GPT-3.5 for faster response
-                messages=messages,
-                temperature=0.1,
-                max_tokens=2000
-            )
-            
-            try:
+            # One initial call plus up to two retries with validation feedback
+            for attempt in range(3):
+                response = await self._create_completion(messages, response_format=self._response_format)
+                if response is None:
+                    return {}
+
                 response_text = response.choices[0].message.content.strip()
-                # Remove any markdown code block markers if present
-                response_text = response_text.replace('```json', '').replace('```', '').strip()
                 print(f"\nOpenAI Response:\n{response_text}\n")
-                parsed_info = json.loads(response_text)
-                
-                # Ensure the response has the expected structure
-                if not isinstance(parsed_info, dict):
-                    print("Error: OpenAI response is not a dictionary")
-                    return {}
-                
-                # Validate and clean up the response
-                cleaned_info = {
-                    'name': str(parsed_info.get('name', '')).strip(),
-                    'contact': {
-                        'email': str(parsed_info.get('contact', {}).get('email', '')).strip(),
-                        'phone': str(parsed_info.get('contact', {}).get('phone', '')).strip()
-                    }
-                }
-                
-                # Handle skills
-                skills = parsed_info.get('skills', [])
-                if isinstance(skills, list):
-                    cleaned_info['skills'] = [str(skill).strip() for skill in skills if skill]
-                else:
-                    cleaned_info['skills'] = []
-                
-                # Handle experience
-                experience = parsed_info.get('experience', [])
-                if isinstance(experience, list):
-                    cleaned_experience = []
-                    for exp in experience:
-                        if isinstance(exp, dict):
-                            cleaned_exp = {
-                                'job_title': str(exp.get('job_title', '')).strip(),
-                                'company_name': str(exp.get('company_name', '')).strip(),
-                                'duration_dates': str(exp.get('duration_dates', '')).strip(),
-                                'key_responsibilities': [str(resp).strip() for resp in exp.get('key_responsibilities', []) if resp]
-                            }
-                            if cleaned_exp['job_title'] and cleaned_exp['company_name']:
-                                cleaned_experience.append(cleaned_exp)
-                    cleaned_info['experience'] = cleaned_experience
-                else:
-                    cleaned_info['experience'] = []
-                
+                try:
+                    cleaned_info = self._validate_resume(response_text)
+                except ValidationError as e:
+                    print(f"Resume validation failed: {str(e)}")
+                    self.validation_retries += 1
+                    messages = messages + [
+                        {"role": "assistant", "content": response_text},
+                        {"role": "user",
+                         "content": f"Your output had error: {e}. Fix and retry with valid JSON only."}
+                    ]
+                    # Brief linear backoff before re-prompting with the error
+                    await asyncio.sleep(1.0 * (attempt + 1))
+                    continue
+
+                if cleaned_info:
+                    self._cache_put(text, cleaned_info)
                 return cleaned_info
-            except json.JSONDecodeError as e:
-                print(f"Error parsing JSON response: {str(e)}")
-                print(f"Response text: {response_text}")
-                return {}
-            except Exception as e:
-                print(f"Error processing OpenAI response: {str(e)}")
-                return {}
+
+            self.validation_failures += 1
+            print("Giving up after repeated validation errors.")
+            return {}
         except openai.APITimeoutError:
             print("OpenAI API request timed out. Please try again.")
             return {}
@@ -154,145 +453,509 @@ class ResumeParser:
             print(f"Unexpected error calling OpenAI API: {str(e)}")
             return {}
 
-    def flatten_dict(self, d: Dict[str, Any], parent_key: str = '', sep: str = '_') -> Dict[str, Any]:
-        """Flatten a nested dictionary by concatenating nested keys."""
-        items = []
-        for k, v in d.items():
-            new_key = f"{parent_key}{sep}{k}" if parent_key else k
-            if isinstance(v, dict):
-                items.extend(self.flatten_dict(v, new_key, sep=sep).items())
-            elif isinstance(v, list):
-                # Handle lists of dictionaries
-                if v and isinstance(v[0], dict):
-                    for i, item in enumerate(v):
-                        items.extend(self.flatten_dict(item, f"{new_key}_{i+1}", sep=sep).items())
-                else:
-                    items.append((new_key, ', '.join(str(x) for x in v) if v else ''))
+    async def extract_information_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """Extract information for several resumes with a single API call.
+
+        The resumes are sent in one prompt and the model is asked to return
+        a JSON object keyed by resume index, so the system prompt is only
+        paid for once per batch. Falls back to one call per resume when the
+        batch response cannot be parsed.
+        """
+        if not texts:
+            return []
+
+        # Serve cached extractions first and only send the misses to the API
+        results: List[Dict[str, Any]] = [{} for _ in texts]
+        misses = []
+        for i, text in enumerate(texts):
+            cached = self.cache.get(self._cache_key(text))
+            if cached is not None:
+                results[i] = cached
             else:
-                items.append((new_key, str(v) if v is not None else ''))
-        return dict(items)
-
-    def parse_resume(self, file_path: str) -> Dict[str, Any]:
-        # Get file extension
-        _, ext = os.path.splitext(file_path)
-        ext = ext.lower()
-
-        # Extract text based on file type
-        if ext == '.pdf':
-            text = self.extract_text_from_pdf(file_path)
-        elif ext == '.docx':
-            text = self.extract_text_from_docx(file_path)
-        elif ext == '.txt':
-            text = self.extract_text_from_txt(file_path)
-        else:
-            print(f"Unsupported file format: {ext}")
+                misses.append(i)
+        if len(misses) < len(texts):
+            print(f"Cache hit for {len(texts) - len(misses)} of {len(texts)} resumes in batch")
+        if not misses:
+            return results
+        if len(misses) == 1:
+            results[misses[0]] = await self.extract_information(texts[misses[0]])
+            return results
+
+        miss_texts = [texts[i] for i in misses]
+        system_content = (
+            f"{self.system_prompt}\n"
+            "You will receive multiple resumes separated by ---RESUME <index>--- markers.\n"
+            "Return ONLY a single JSON object keyed by resume index, e.g. {\"0\": {...}, \"1\": {...}}."
+        )
+        user_content = '\n'.join(f"---RESUME {i}---\n{text}" for i, text in enumerate(miss_texts))
+        messages = [
+            {"role": "system", "content": system_content},
+            {"role": "user", "content": user_content}
+        ]
+
+        try:
+            response = await self._create_completion(
+                messages,
+                max_tokens=min(MODEL_COMPLETION_TOKENS, BATCH_COMPLETION_SHARE * len(miss_texts)),
+                response_format={"type": "json_object"})
+            if response is not None:
+                response_text = response.choices[0].message.content.strip()
+                # Clean records one at a time as they are parsed instead of
+                # materializing the whole response dict first
+                by_index = {}
+                for key, record in self._iter_batch_records(response_text):
+                    by_index[key] = self._clean_parsed_info(record)
+                if by_index:
+                    for j, i in enumerate(misses):
+                        cleaned_info = by_index.get(str(j), {})
+                        if cleaned_info:
+                            self._cache_put(texts[i], cleaned_info)
+                        results[i] = cleaned_info
+                    return results
+                print("Error: batch response contained no records")
+        except BATCH_PARSE_ERRORS as e:
+            print(f"Error parsing batch JSON response: {str(e)}")
+        except openai.APIError as e:
+            print(f"OpenAI API error on batch request: {str(e)}")
+        except Exception as e:
+            print(f"Unexpected error on batch request: {str(e)}")
+
+        # Retry one resume at a time so a bad batch response doesn't lose the whole batch
+        print(f"Falling back to per-resume extraction for batch of {len(misses)}")
+        for i in misses:
+            results[i] = await self.extract_information(texts[i])
+        return results
+
+    async def extract_information_batch_api(self, items: List[Tuple[str, str]],
+                                            poll_interval: float = 30.0) -> Dict[str, Dict[str, Any]]:
+        """Submit all resumes through the OpenAI Batch API and wait for results.
+
+        The Batch API runs at a 50% discount with separate rate limits, at
+        the cost of waiting for the batch to complete (up to 24 hours).
+        Returns a mapping of filename to cleaned resume info.
+        """
+        # Serve cached extractions first and only submit the misses
+        results = {}
+        misses = []
+        for file_path, text in items:
+            cached = self.cache.get(self._cache_key(text))
+            if cached is not None:
+                results[os.path.basename(file_path)] = cached
+            else:
+                misses.append((file_path, text))
+        if len(misses) < len(items):
+            print(f"Cache hit for {len(items) - len(misses)} of {len(items)} resumes")
+        if not misses:
+            return results
+
+        lines = []
+        for file_path, text in misses:
+            lines.append(json.dumps({
+                "custom_id": os.path.basename(file_path),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": MODEL_NAME,
+                    "messages": self._build_messages(text),
+                    "temperature": 0.1,
+                    "max_tokens": 2000,
+                    "response_format": self._response_format
+                }
+            }))
+        jsonl = '\n'.join(lines).encode('utf-8')
+
+        try:
+            input_file = await self.client.files.create(file=("resumes.jsonl", jsonl), purpose="batch")
+            batch = await self.client.batches.create(
+                input_file_id=input_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            )
+            print(f"Submitted batch {batch.id} with {len(misses)} resumes")
+
+            while batch.status not in ('completed', 'failed', 'expired', 'cancelled'):
+                await asyncio.sleep(poll_interval)
+                batch = await self.client.batches.retrieve(batch.id)
+                print(f"Batch {batch.id} status: {batch.status}")
+
+            if batch.status != 'completed' or not batch.output_file_id:
+                print(f"Batch {batch.id} did not complete: {batch.status}")
+                return results
+
+            output = await self.client.files.content(batch.output_file_id)
+        except openai.APIError as e:
+            print(f"OpenAI API error on Batch API request: {str(e)}")
+            return results
+
+        texts_by_id = {os.path.basename(file_path): text for file_path, text in misses}
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"Skipping malformed batch output line: {str(e)}")
+                continue
+            custom_id = record.get('custom_id', '')
+            response = record.get('response') or {}
+            if response.get('status_code') != 200:
+                print(f"Batch request for {custom_id} failed with status {response.get('status_code')}")
+                continue
+            try:
+                content = response['body']['choices'][0]['message']['content'].strip()
+                cleaned_info = self._clean_parsed_info(json.loads(content))
+                if cleaned_info and custom_id in texts_by_id:
+                    self._cache_put(texts_by_id[custom_id], cleaned_info)
+                results[custom_id] = cleaned_info
+            except (KeyError, IndexError, json.JSONDecodeError) as e:
+                print(f"Error parsing batch output for {custom_id}: {str(e)}")
+        return results
+
+    def truncate_text(self, text: str) -> str:
+        """Cap resume text at MAX_RESUME_TOKENS before it reaches a prompt.
+
+        Deterministic, so truncated text stays stable for the cache key.
+        """
+        # Collapse whitespace runs before line breaks; pure boilerplate tokens
+        text = re.sub(r"\s+\n", "\n", text)
+        if self._encoder is not None:
+            ids = self._encoder.encode(text)
+            if len(ids) > MAX_RESUME_TOKENS:
+                print(f"Truncating resume from {len(ids)} to {MAX_RESUME_TOKENS} tokens")
+                text = self._encoder.decode(ids[:MAX_RESUME_TOKENS])
+            return text
+        # Without tiktoken, approximate with ~4 characters per token
+        max_chars = MAX_RESUME_TOKENS * 4
+        if len(text) > max_chars:
+            print(f"Truncating resume from {len(text)} to {max_chars} characters")
+            text = text[:max_chars]
+        return text
+
+    def quick_parse(self, text: str) -> Optional[Dict[str, Any]]:
+        """Decide whether a resume is worth an LLM call at all.
+
+        Returns {} for empty or corrupt extractions, a regex-only parse
+        when the text carries no resume sections (so contact details are
+        the best we can do), or None when the full extraction should run.
+        """
+        stripped = text.strip()
+        if len(stripped) < MIN_RESUME_CHARS or not LONG_WORD_RE.search(stripped):
             return {}
+        if SECTION_RE.search(stripped) is None:
+            email = EMAIL_RE.search(stripped)
+            phone = PHONE_RE.search(stripped)
+            return {
+                'name': '',
+                'contact': {
+                    'email': email.group() if email else '',
+                    'phone': phone.group() if phone else '',
+                },
+                'skills': [],
+                'experience': [],
+            }
+        return None
+
+    def _iter_batch_records(self, response_text: str):
+        """Yield (index, record) pairs from an index-keyed batch response.
 
+        Streams the response incrementally with ijson when available, so
+        the first resume can be cleaned while the rest of a large batch
+        response is still being parsed.
+        """
+        if ijson is not None:
+            yield from ijson.kvitems(io.StringIO(response_text), '')
+            return
+        parsed = json.loads(response_text)
+        if isinstance(parsed, dict):
+            yield from parsed.items()
+
+    def batch_overhead_tokens(self) -> int:
+        """Token cost of the batch prompt before any resume is added."""
+        return len(self.system_prompt) // 4 + 200
+
+    def resume_token_cost(self, text: str) -> int:
+        """Token cost of one resume in a batch, including its share of the
+        batch completion budget."""
+        return len(text) // 4 + BATCH_COMPLETION_SHARE
+
+    def _validate_resume(self, response_text: str) -> Dict[str, Any]:
+        """Parse and validate a model response against the Resume schema.
+
+        Raises ValidationError when the response is not valid JSON or does
+        not match the schema.
+        """
+        return self._finish_resume(Resume.model_validate_json(response_text))
+
+    def _clean_parsed_info(self, parsed_info: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate and clean up a parsed resume returned by the model."""
+        if not isinstance(parsed_info, dict):
+            return {}
+        try:
+            return self._finish_resume(Resume.model_validate(parsed_info))
+        except ValidationError as e:
+            print(f"Resume validation failed: {str(e)}")
+            return {}
+
+    def _finish_resume(self, resume: Resume) -> Dict[str, Any]:
+        info = resume.model_dump()
+        # Keep only experience entries that identify a role
+        info['experience'] = [exp for exp in info['experience']
+                              if exp['job_title'] and exp['company_name']]
+        info['skills'] = [skill for skill in info['skills'] if skill]
+        return info
+
+    async def parse_resume(self, file_path: str) -> Dict[str, Any]:
+        text = extract_text(file_path)
         if not text:
             print(f"Failed to extract text from {file_path}")
             return {}
 
+        text = self.truncate_text(text)
+        quick = self.quick_parse(text)
+        if quick is not None:
+            return self.format_for_csv(quick)
+
         # Extract information using OpenAI
-        parsed_info = self.extract_information(text)
-        
-        # Format skills for CSV output
-        if 'skills' in parsed_info:
-            skills = parsed_info.get('skills', [])
-        # Flatten contact information
-        if 'contact' in parsed_info:
-            contact = parsed_info.pop('contact', {})
-            parsed_info.update({
-                'email': contact.get('email', ''),
-                'phone': contact.get('phone', '')
-            })
-        
-        # Format skills as a single string
-        if 'skills' in parsed_info:
-            skills = parsed_info.get('skills', [])
-            if isinstance(skills, list):
-                parsed_info['skills'] = ', '.join(str(skill) for skill in skills if skill)
-            else:
-                parsed_info['skills'] = ''
-        
-        # Format experience as a concise string
-        if 'experience' in parsed_info:
-            experience = parsed_info.pop('experience', [])
-            exp_entries = []
-            for exp in experience:
-                if isinstance(exp, dict):
-                    job_title = exp.get('job_title', '')
-                    company = exp.get('company_name', '')
-                    duration = exp.get('duration_dates', '')
-                    if job_title and company:
-                        exp_entries.append(f"{job_title} at {company} ({duration})")
-            parsed_info['experience'] = ' | '.join(exp_entries) if exp_entries else ''
-                
+        parsed_info = await self.extract_information(text)
+        return self.format_for_csv(parsed_info)
+
+    def format_for_csv(self, parsed_info: Dict[str, Any]) -> Dict[str, Any]:
+        """Flatten a validated resume dict into CSV-friendly string columns.
+
+        Input always comes through the Resume schema, so the shape is
+        guaranteed: contact is a dict of strings, skills a list of
+        non-empty strings and experience a list of entries that each name
+        a job title and company.
+        """
+        if not parsed_info:
+            return parsed_info
+
+        contact = parsed_info.pop('contact', {})
+        parsed_info['email'] = contact.get('email', '')
+        parsed_info['phone'] = contact.get('phone', '')
+        parsed_info['skills'] = ', '.join(parsed_info.get('skills', []))
+        parsed_info['experience'] = ' | '.join(
+            f"{exp['job_title']} at {exp['company_name']} ({exp['duration_dates']})"
+            for exp in parsed_info.pop('experience', [])
+        )
         return parsed_info
 
-def process_single_resume(file_path: str) -> Dict[str, Any]:
-    """Process a single resume file and return the parsed information."""
-    parser = ResumeParser()
+async def process_resume_batch(batch: List[Tuple[str, str]], parser: ResumeParser,
+                               concurrency: AdaptiveConcurrency,
+                               writer) -> int:
+    """Process a batch of (file_path, text) pairs and return how many succeeded."""
+    processed = 0
     try:
-        print(f"Processing: {os.path.basename(file_path)}")
-        parsed_info = parser.parse_resume(file_path)
-        if parsed_info:
+        async with concurrency:
+            print(f"Processing batch of {len(batch)}: "
+                  f"{', '.join(os.path.basename(p) for p, _ in batch)}")
+            results = await parser.extract_information_batch([text for _, text in batch])
+
+        for (file_path, _), parsed_info in zip(batch, results):
+            filename = os.path.basename(file_path)
+            if not parsed_info:
+                print(f"No information extracted from {filename}")
+                continue
+            parsed_info = parser.format_for_csv(parsed_info)
             print(f"Parsed information: {parsed_info}")
-            parsed_info['filename'] = os.path.basename(file_path)
-            print(type(parsed_info))
-            append_to_csv(parsed_info)
-            return parsed_info
+            parsed_info['filename'] = filename
+            # The writer queue serializes appends across concurrent workers
+            write_result(parsed_info, writer)
+            processed += 1
     except Exception as e:
-        print(f"Error processing {os.path.basename(file_path)}: {str(e)}")
-    return None
+        print(f"Error processing batch: {str(e)}")
+    return processed
 
-def append_to_csv(parsed_info: Dict[str, Any], output_file: str = 'resume_details.csv'):
-    """Append a single resume's information to the CSV file."""
-    try:
-        print(f"Processing: {parsed_info.get('name', 'unknown')}")
+CSV_FIELDNAMES = ['filename', 'Name', 'Email', 'Phone', 'Skills', 'Experience']
+
+# Primary columnar output; the CSV is exported from it once per run
+PARQUET_OUTPUT = 'resume_details.parquet'
+
+class CsvResultWriter:
+    """Append rows straight to the CSV; used when pyarrow is unavailable.
+
+    The header is written only when the file is new, so there is no
+    per-row existence check racing between workers.
+    """
+    def __init__(self, output_file: str):
+        write_header = not os.path.exists(output_file) or os.path.getsize(output_file) == 0
+        self._file = open(output_file, 'a', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._file, fieldnames=CSV_FIELDNAMES)
+        if write_header:
+            self._writer.writeheader()
+
+    def write_row(self, row: Dict[str, Any]):
+        self._writer.writerow(row)
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
 
-        # Extract contact info
-        contact = parsed_info.get('contact', {})
-        print(f"Contact: {contact}")
-        print(f"before simplifying {parsed_info}")
+class ParquetResultWriter:
+    """Write rows to Parquet in row groups, with a one-shot CSV export.
+
+    Rows are buffered and flushed as a row group every `batch_size`
+    resumes, so disk writes are amortized instead of one per row. On
+    close the table is exported to the CSV once for consumers of the old
+    format.
+    """
+    def __init__(self, output_file: str, csv_file: str, batch_size: int = 100):
+        self.output_file = output_file
+        self.csv_file = csv_file
+        self.batch_size = batch_size
+        self.schema = pa.schema([(name, pa.string()) for name in CSV_FIELDNAMES])
+        # ParquetWriter truncates, so carry over rows from previous runs.
+        # New data goes to a temp file that replaces the real one only on
+        # close, so a crashed run never destroys earlier results.
+        existing = None
+        if os.path.exists(output_file):
+            try:
+                existing = pq.read_table(output_file)
+            except Exception as e:
+                print(f"Error reading existing {output_file}: {str(e)}")
+        self._tmp_file = output_file + '.tmp'
+        self._writer = pq.ParquetWriter(self._tmp_file, self.schema)
+        if existing is not None and existing.num_rows:
+            self._writer.write_table(existing.cast(self.schema))
+        elif os.path.exists(csv_file):
+            # No readable Parquet yet: seed from the legacy CSV so the
+            # close-time export cannot drop previously processed results
+            rows = self._read_csv_rows(csv_file)
+            if rows:
+                self._writer.write_table(pa.Table.from_pylist(rows, schema=self.schema))
+        self._batch: List[Dict[str, Any]] = []
+
+    def _read_csv_rows(self, csv_file: str) -> List[Dict[str, Any]]:
+        try:
+            with open(csv_file, newline='', encoding='utf-8') as f:
+                return [{name: row.get(name) or '' for name in CSV_FIELDNAMES}
+                        for row in csv.DictReader(f)]
+        except Exception as e:
+            print(f"Error reading existing {csv_file}: {str(e)}")
+            return []
+
+    def write_row(self, row: Dict[str, Any]):
+        self._batch.append(row)
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self._batch:
+            self._writer.write_table(pa.Table.from_pylist(self._batch, schema=self.schema))
+            self._batch = []
+
+    def close(self):
+        self.flush()
+        self._writer.close()
+        os.replace(self._tmp_file, self.output_file)
+        try:
+            table = pq.read_table(self.output_file)
+            with open(self.csv_file, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=CSV_FIELDNAMES)
+                writer.writeheader()
+                for row in table.to_pylist():
+                    writer.writerow(row)
+        except Exception as e:
+            print(f"Error exporting {self.csv_file}: {str(e)}")
+
+class ThreadedResultWriter:
+    """Feed rows to a single background writer thread through a queue.
+
+    Workers enqueue rows and return immediately; the thread drains the
+    queue so disk writes stay sequential and coalesced without a lock
+    in the hot path. The underlying writer is flushed every
+    `flush_every` rows to bound data loss if the run is killed.
+    """
+    def __init__(self, inner, flush_every: int = 50):
+        self._inner = inner
+        self._flush_every = flush_every
+        self._queue: queue.Queue = queue.Queue(maxsize=256)
+        self._thread = threading.Thread(target=self._drain, daemon=True)
+        self._thread.start()
+
+    def _drain(self):
+        written = 0
+        while True:
+            row = self._queue.get()
+            if row is None:
+                return
+            try:
+                self._inner.write_row(row)
+                written += 1
+                if written % self._flush_every == 0:
+                    self._inner.flush()
+            except Exception as e:
+                print(f"Error writing result row: {str(e)}")
+
+    def write_row(self, row: Dict[str, Any]):
+        self._queue.put(row)
+
+    def close(self):
+        # Sentinel stops the thread once everything queued has been written
+        self._queue.put(None)
+        self._thread.join()
+        self._inner.close()
+
+def open_result_writer(output_file: str):
+    """Open the output sink for the run: Parquet when pyarrow is available."""
+    if pa is not None:
+        return ThreadedResultWriter(ParquetResultWriter(PARQUET_OUTPUT, output_file))
+    return ThreadedResultWriter(CsvResultWriter(output_file))
+
+def write_result(parsed_info: Dict[str, Any], writer):
+    """Write a single resume's information to the open result writer."""
+    try:
         simplified_resume = {
             'filename': parsed_info.get('filename', ''),
             'Name': parsed_info.get('name', ''),
             'Email': parsed_info.get('email', ''),
             'Phone': parsed_info.get('phone', ''),
-            'Skills': parsed_info.get('skills', []),
-            'Experience': parsed_info.get('experience', [])
+            'Skills': parsed_info.get('skills', ''),
+            'Experience': parsed_info.get('experience', '')
         }
-
-        print(f"Final simplified_resume: {simplified_resume}")
-
-        # Write to CSV
-        fieldnames = ['filename', 'Name', 'Email', 'Phone', 'Skills', 'Experience']
-        file_exists = os.path.exists(output_file)
-
-        # Open file in append mode with proper encoding
-        with open(output_file, 'a', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            if not file_exists:
-                writer.writeheader()
-            writer.writerow(simplified_resume)
-            print(f"Successfully processed {simplified_resume['Name']}")
+        writer.write_row(simplified_resume)
+        print(f"Successfully processed {simplified_resume['Name']}")
     except Exception as e:
         print(f"Error processing {parsed_info.get('name', 'unknown')} : {str(e)}")
 
-def check_if_processed(filename: str, output_file: str) -> bool:
-    """Check if a file has already been processed by looking for its filename in the CSV."""
+def load_processed_filenames(output_file: str) -> set:
+    """Read the set of already-processed filenames from the output.
+
+    Prefers the Parquet file, which only reads the filename column;
+    falls back to column 0 of the CSV.
+    """
+    if pa is not None and os.path.exists(PARQUET_OUTPUT):
+        try:
+            return set(pq.read_table(PARQUET_OUTPUT, columns=['filename'])['filename'].to_pylist())
+        except Exception as e:
+            print(f"Error reading {PARQUET_OUTPUT}: {str(e)}")
+
     if not os.path.exists(output_file):
-        return False
-        
+        return set()
+
     try:
-        with open(output_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-            return filename in content
+        with open(output_file, 'r', encoding='utf-8', newline='') as f:
+            return {row[0] for row in csv.reader(f) if row}
     except Exception as e:
         print(f"Error checking processed status: {str(e)}")
-        return False
+        return set()
+
+def parse_args():
+    arg_parser = argparse.ArgumentParser(description='Parse resumes with OpenAI and save them to CSV.')
+    arg_parser.add_argument('--batch-api', action='store_true',
+                            help='Submit all resumes through the OpenAI Batch API '
+                                 '(50%% cheaper, completes within 24 hours)')
+    arg_parser.add_argument('--start-concurrency', type=int, default=4,
+                            help='Initial number of concurrent API calls (default: 4)')
+    arg_parser.add_argument('--max-concurrency', type=int, default=32,
+                            help='Upper bound the adaptive controller may ramp up to (default: 32)')
+    return arg_parser.parse_args()
+
+async def main():
+    args = parse_args()
 
-def main():
     # Get all resume files in the resumes directory
     resume_dir = 'resumes'
     if not os.path.exists(resume_dir):
@@ -309,24 +972,117 @@ def main():
         return
 
     output_file = 'resume_details.csv'
-    
-    # Process each resume one at a time
+
+    # Process resumes concurrently, capped by the adaptive controller and rate limiter
+    concurrency = AdaptiveConcurrency(start=args.start_concurrency, maximum=args.max_concurrency)
+    rate_limiter = RateLimiter()
+    parser = ResumeParser(rate_limiter=rate_limiter, concurrency=concurrency)
+
+    # Exact-match lookup of already-processed filenames, built once per run
+    processed_files = load_processed_filenames(output_file)
+
+    to_process = []
     for file_path in resume_files:
         filename = os.path.basename(file_path)
-        
-        # Check if this file has already been processed
-        if check_if_processed(filename, output_file):
+        if filename in processed_files:
             print(f"Skipping {filename} - already processed")
             continue
-        
-        print(f"\nProcessing: {filename}")
-        parsed_info = process_single_resume(file_path)
-        if parsed_info:
-            # response = input("Press Enter to process the next resume (or 'q' to quit)...")
-            # if response.lower() == 'q':
-            #     print("Stopping resume processing.")
-            #     break
-            print(f"Successfully processed {filename}")
+        to_process.append(file_path)
+
+    if not to_process:
+        print("All resumes already processed.")
+        return
+
+    # Extract text in worker processes: the PyPDF2 fallback is pure-Python
+    # CPU work that threads cannot scale past the GIL
+    loop = asyncio.get_running_loop()
+
+    async def extract_one(executor, file_path):
+        text = await loop.run_in_executor(executor, extract_text, file_path)
+        if text:
+            text = parser.truncate_text(text)
+        return file_path, text
+
+    # One open sink for the whole run instead of one write per row
+    writer = open_result_writer(output_file)
+
+    def handle_without_llm(file_path: str, text: str) -> bool:
+        """Write trivial resumes straight to the output, skipping the API."""
+        quick = parser.quick_parse(text)
+        if quick is None:
+            return False
+        filename = os.path.basename(file_path)
+        if quick:
+            parsed_info = parser.format_for_csv(quick)
+            parsed_info['filename'] = filename
+            write_result(parsed_info, writer)
+            print(f"No resume sections in {filename} - wrote regex-only contact info")
+        else:
+            print(f"Skipping {filename} - no usable text extracted")
+        return True
+
+    try:
+        if args.batch_api:
+            # Offline path: one Batch API job for the whole folder, no RPM pressure
+            with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+                pairs = await asyncio.gather(*[extract_one(executor, p) for p in to_process])
+            pending = []
+            for file_path, text in pairs:
+                if not text:
+                    print(f"Failed to extract text from {file_path}")
+                    continue
+                if handle_without_llm(file_path, text):
+                    continue
+                pending.append((file_path, text))
+
+            results = await parser.extract_information_batch_api(pending)
+            processed = 0
+            for filename, parsed_info in results.items():
+                if not parsed_info:
+                    print(f"No information extracted from {filename}")
+                    continue
+                parsed_info = parser.format_for_csv(parsed_info)
+                parsed_info['filename'] = filename
+                write_result(parsed_info, writer)
+                processed += 1
+            print(f"\nProcessed {processed} of {len(pending)} resumes via the Batch API.")
+            return
+
+        # Dispatch batches as soon as their texts finish extracting, so the first
+        # API calls go out before the whole folder has been read
+        tasks = []
+        current: List[Tuple[str, str]] = []
+        used = parser.batch_overhead_tokens()
+        pending_count = 0
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            for coro in asyncio.as_completed([extract_one(executor, p) for p in to_process]):
+                file_path, text = await coro
+                if not text:
+                    print(f"Failed to extract text from {file_path}")
+                    continue
+                if handle_without_llm(file_path, text):
+                    continue
+                pending_count += 1
+                # Batches are auto-sized against the model context window
+                cost = parser.resume_token_cost(text)
+                if current and (used + cost > MODEL_CONTEXT_TOKENS or len(current) >= MAX_BATCH_SIZE):
+                    tasks.append(asyncio.create_task(
+                        process_resume_batch(current, parser, concurrency, writer)))
+                    current = []
+                    used = parser.batch_overhead_tokens()
+                current.append((file_path, text))
+                used += cost
+        if current:
+            tasks.append(asyncio.create_task(
+                process_resume_batch(current, parser, concurrency, writer)))
+
+        results = await asyncio.gather(*tasks)
+        print(f"\nProcessed {sum(results)} of {pending_count} resumes in {len(tasks)} API calls.")
+    finally:
+        if parser.validation_retries:
+            print(f"Validation retries this run: {parser.validation_retries} "
+                  f"({parser.validation_failures} gave up)")
+        writer.close()
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())